@@ -5,6 +5,7 @@ Modules:
 - audio_capture: microphone recording utilities.
 - transcription: speech-to-text services.
 - tokenization: adapters for converting text to LLM tokens.
+- lru: small thread-safe LRU cache shared by the modules.
 - app: orchestration entry point.
 """
 
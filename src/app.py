@@ -7,11 +7,12 @@ import logging
 import sys
 from pathlib import Path
 
+import numpy as np
+
 from audio_capture import AudioCaptureConfig, MicrophoneRecorder
 from config import load_environment
-from tokenization import LLMTokenizer
-from transcription import SpeechToTextError, SpeechToTextService, WhisperLocalTranscriber
-from summarization import SummarizationError, summarize_with_ollama
+from tokenization import get_tokenizer
+from transcription import PROVIDERS, SpeechToTextError, SpeechToTextService, create_transcriber
 
 load_environment()
 
@@ -27,15 +28,42 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--duration", type=float, default=5.0, help="Recording duration in seconds")
     parser.add_argument("--sample-rate", type=int, default=16_000, help="Audio sample rate")
     parser.add_argument("--channels", type=int, default=1, help="Number of audio channels")
+    parser.add_argument(
+        "--provider",
+        choices=PROVIDERS,
+        default=None,
+        help="Local transcription backend (default: faster-whisper when installed)",
+    )
     parser.add_argument("--whisper-model", type=str, default="base", help="Local Whisper model name")
+    parser.add_argument(
+        "--compute-type",
+        type=str,
+        default=None,
+        help="faster-whisper compute type (default: int8 on CPU, int8_float16 on CUDA)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=0,
+        help="Decode with faster-whisper's batched pipeline using this batch size (0 disables)",
+    )
     parser.add_argument("--tokenizer-model", type=str, default=None, help="LLM model name for tokenization")
     parser.add_argument("--encoding", type=str, default=None, help="Explicit tiktoken encoding name")
     parser.add_argument("--output-wav", type=str, default=None, help="Optional path to store raw audio")
     parser.add_argument("--print-tokens", action="store_true", help="Print token ids instead of just counts")
+    parser.add_argument(
+        "--tokens-output",
+        type=str,
+        default=None,
+        help="Optional path to store token ids as raw little-endian int32",
+    )
     parser.add_argument("--summarize", action="store_true", help="Summarize transcript with local LLM (Ollama).")
     parser.add_argument("--ollama-model", type=str, default=None, help="Ollama model name (default: llama3)")
     parser.add_argument("--ollama-url", type=str, default=None, help="Ollama HTTP endpoint (default: http://localhost:11434/api/generate)")
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.batch_size > 0 and args.provider == "whisper-local":
+        parser.error("--batch-size requires --provider faster-whisper")
+    return args
 
 
 def main() -> int:
@@ -62,7 +90,7 @@ def main() -> int:
         return 1
 
     logger.info("Transcript: %s", transcription.text)
-    tokenizer = LLMTokenizer(model=args.tokenizer_model, encoding_name=args.encoding)
+    tokenizer = get_tokenizer(args.tokenizer_model, args.encoding)
     token_result = tokenizer.encode(transcription.text)
     logger.info(
         "Tokenized using encoding '%s': %s tokens",
@@ -70,9 +98,16 @@ def main() -> int:
         token_result.count(),
     )
     if args.print_tokens:
-        logger.info("Token ids: %s", token_result.tokens)
+        sys.stdout.write(",".join(map(str, token_result.tokens)))
+        sys.stdout.write("\n")
+    if args.tokens_output:
+        np.asarray(token_result.tokens, dtype="<i4").tofile(args.tokens_output)
+        logger.info("Saved token ids to %s", Path(args.tokens_output).resolve())
 
     if args.summarize:
+        # Imported here so runs without --summarize never load requests.
+        from summarization import SummarizationError, summarize_with_ollama
+
         try:
             summary = summarize_with_ollama(
                 transcription.text,
@@ -88,7 +123,12 @@ def main() -> int:
 
 
 def build_transcriber(args: argparse.Namespace) -> SpeechToTextService:
-    return WhisperLocalTranscriber(model_name=args.whisper_model)
+    return create_transcriber(
+        args.provider,
+        model_name=args.whisper_model,
+        compute_type=args.compute_type,
+        batch_size=args.batch_size,
+    )
 
 
 if __name__ == "__main__":
@@ -2,25 +2,32 @@
 
 from __future__ import annotations
 
-import contextlib
 from dataclasses import dataclass
 import logging
+import queue
 import threading
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional
 
 import numpy as np
 import sounddevice as sd
 import soundfile as sf
 
 
+_WAV_SUBTYPES = {"float32": "FLOAT", "int16": "PCM_16", "int32": "PCM_32"}
+
+
 @dataclass
 class AudioCaptureConfig:
     """Configuration options for microphone capture."""
 
     sample_rate: int = 16_000
     channels: int = 1
-    dtype: str = "float32"
+    dtype: str = "int16"
+
+    def __post_init__(self) -> None:
+        if self.dtype not in _WAV_SUBTYPES:
+            raise ValueError(f"Unsupported capture dtype {self.dtype!r}; use one of {', '.join(_WAV_SUBTYPES)}")
 
 
 class MicrophoneRecorder:
@@ -35,75 +42,95 @@ class MicrophoneRecorder:
         if frames <= 0:
             raise ValueError("duration must be positive")
 
-        with _input_stream(self.config) as stream: #creates context manager as StreamWrapper instance
-            stream.start()
-            audio = stream.record(frames) #returns an array of floating-point amplitudes - 1/1600o of a second
-        return audio.reshape(-1, self.config.channels)
+        audio = np.empty((frames, self.config.channels), dtype=self.config.dtype)
+        sd.rec(out=audio, samplerate=self.config.sample_rate, blocking=True) #fills audio in place, no reshape/copy
+        return audio
 
     def save_wav(self, audio: np.ndarray, output_path: str | Path) -> None:
         """Persist recorded audio to a WAV file."""
         path = Path(output_path)
         path.parent.mkdir(parents=True, exist_ok=True)
-        sf.write(
-            file=path,
-            data=audio,
+        audio = np.ascontiguousarray(audio)
+        subtype = _WAV_SUBTYPES.get(audio.dtype.name)
+        with sf.SoundFile(
+            path,
+            mode="w",
             samplerate=self.config.sample_rate,
+            channels=audio.shape[1] if audio.ndim > 1 else 1,
             format="WAV",
-        )
-
+            subtype=subtype,
+        ) as wav:
+            if subtype is None:
+                wav.write(audio)
+            else:
+                # Sample format matches the subtype, so this is a plain copy.
+                wav.buffer_write(audio, dtype=audio.dtype.name)
 
-@contextlib.contextmanager
-def _input_stream(config: AudioCaptureConfig):
-    """Context manager that yields an input stream."""
-    stream = sd.InputStream( #instantiates new stream instance with params
-        samplerate=config.sample_rate,
-        channels=config.channels,
-        dtype=config.dtype,
-    )
-    try:
-        yield _StreamWrapper(stream)
-    finally:
-        stream.close()
 
+logger = logging.getLogger(__name__)
 
-class _StreamWrapper:
-    """Thin wrapper to expose a consistent record API."""
-
-    def __init__(self, stream: sd.InputStream) -> None:
-        self._stream = stream
-
-    def start(self) -> None:
-        """Start the stream, guarding against repeated starts."""
-        if not self._stream.active:
-            self._stream.start()
-
-    def record(self, frames: int) -> np.ndarray:
-        """Record a fixed number of frames."""
-        data, _overflowed = self._stream.read(frames)
-        return data
 
-    def close(self) -> None:
-        self._stream.close()
+def _prefaulted(shape: tuple[int, int], dtype: str) -> np.ndarray:
+    """Allocate a buffer and touch every page so the audio callback never page-faults."""
+    buffer = np.empty(shape, dtype=dtype)
+    buffer.fill(0)
+    return buffer
 
 
-logger = logging.getLogger(__name__)
+class StreamingMicrophoneRecorder:
+    """Capture audio until stop() is invoked, buffering samples incrementally.
 
+    Samples are written into a preallocated buffer so the PortAudio callback
+    never allocates, copies into Python lists or takes a lock. When the buffer
+    is half full a worker thread allocates a larger one and copies the audio
+    captured so far; the callback only copies the few blocks written since.
 
-class StreamingMicrophoneRecorder:
-    """Capture audio until stop() is invoked, buffering samples incrementally."""
+    When start() is given an output path the samples are streamed straight
+    into a WAV file instead, and stop() memory-maps the file's sample data.
+    """
 
-    def __init__(self, config: Optional[AudioCaptureConfig] = None) -> None:
+    def __init__(self, config: Optional[AudioCaptureConfig] = None, max_seconds: float = 300.0) -> None:
         self.config = config or AudioCaptureConfig()
         self._stream: Optional[sd.InputStream] = None
-        self._buffer: List[np.ndarray] = []
-        self._lock = threading.Lock()
-
-    def start(self) -> None:
+        self._capacity = max(int(max_seconds * self.config.sample_rate), 1)
+        self._ring = np.empty((0, self.config.channels), dtype=self.config.dtype)
+        self._write_idx = 0
+        self._grow_at = 0
+        self._dropped = 0
+        self._status = sd.CallbackFlags()
+        self._grow_requests: queue.SimpleQueue = queue.SimpleQueue()
+        self._grown: queue.SimpleQueue = queue.SimpleQueue()
+        self._grow_worker: Optional[threading.Thread] = None
+        self._sf: Optional[sf.SoundFile] = None
+        self._output_path: Optional[Path] = None
+
+    def start(self, output_path: str | Path | None = None) -> None:
         """Begin capturing audio using a callback-based stream."""
         if self._stream is not None:
             raise RuntimeError("Recorder already running")
 
-        self._buffer = []
+        self._write_idx = 0
+        self._dropped = 0
+        self._status = sd.CallbackFlags()
+        if output_path is not None:
+            self._output_path = Path(output_path)
+            self._output_path.parent.mkdir(parents=True, exist_ok=True)
+            self._sf = sf.SoundFile(
+                self._output_path,
+                mode="w",
+                samplerate=self.config.sample_rate,
+                channels=self.config.channels,
+                format="WAV",
+                subtype=_WAV_SUBTYPES[self.config.dtype],
+            )
+        else:
+            self._ring = _prefaulted((self._capacity, self.config.channels), self.config.dtype)
+            self._grow_at = self._capacity // 2
+            self._grow_requests = queue.SimpleQueue()
+            self._grown = queue.SimpleQueue()
+            self._grow_worker = threading.Thread(target=self._grow_loop, daemon=True)
+            self._grow_worker.start()
+
         self._stream = sd.InputStream(
             samplerate=self.config.sample_rate,
             channels=self.config.channels,
@@ -113,27 +140,90 @@ class StreamingMicrophoneRecorder:
         self._stream.start()
 
     def stop(self) -> np.ndarray:
-        """Stop capturing and return the buffered audio."""
+        """Stop capturing and return the buffered audio.
+
+        The result is a view into the capture buffer (or a read-only memmap of
+        the WAV file); the next start() allocates a fresh buffer, so it stays
+        valid.
+        """
         if self._stream is None:
             raise RuntimeError("Recorder not running")
 
         self._stream.stop()
         self._stream.close()
         self._stream = None
+        if self._status:
+            logger.warning("Input stream status: %s", self._status)
 
-        with self._lock:
-            if not self._buffer:
-                return np.empty((0, self.config.channels), dtype=self.config.dtype)
-            audio = np.concatenate(self._buffer, axis=0)
-            self._buffer = []
-        return audio
+        if self._sf is not None:
+            self._sf.close()
+            self._sf = None
+            return self._map_output()
+
+        self._grow_requests.put(None)
+        if self._grow_worker is not None:
+            self._grow_worker.join()
+            self._grow_worker = None
+        self._adopt_grown()
+
+        if self._dropped:
+            logger.warning("Capture buffer full; dropped %d frames", self._dropped)
+        return self._ring[: self._write_idx]
 
     def is_running(self) -> bool:
         return self._stream is not None
 
     def _callback(self, indata: np.ndarray, frames: int, time, status) -> None:  # type: ignore[override]
+        # Accumulate xrun flags and log them from stop(); logging here would take
+        # the handler locks and do I/O on the audio thread.
         if status:
-            logger.warning("Input stream status: %s", status)
-        with self._lock:
-            self._buffer.append(indata.copy())
-
+            self._status |= status
+        if self._sf is not None:
+            self._sf.buffer_write(indata, dtype=self.config.dtype)
+            self._write_idx += frames
+            return
+        if not self._grown.empty():
+            self._adopt_grown()
+
+        start = self._write_idx
+        end = start + frames
+        if end > self._ring.shape[0]:
+            self._dropped += frames
+            return
+        self._ring[start:end] = indata
+        self._write_idx = end
+
+        if end >= self._grow_at:
+            self._grow_at = self._ring.shape[0]
+            self._grow_requests.put(self._ring.shape[0] * 2)
+
+    def _adopt_grown(self) -> None:
+        """Swap in a buffer prepared by the grow worker (audio thread or after stop)."""
+        while not self._grown.empty():
+            grown, copied = self._grown.get_nowait()
+            grown[copied : self._write_idx] = self._ring[copied : self._write_idx]
+            self._ring = grown
+            self._grow_at = grown.shape[0] // 2
+
+    def _map_output(self) -> np.ndarray:
+        """Memory-map the sample data of the WAV file written during capture."""
+        if self._write_idx == 0:
+            return np.empty((0, self.config.channels), dtype=self.config.dtype)
+        dtype = np.dtype(self.config.dtype)
+        shape = (self._write_idx, self.config.channels)
+        # libsndfile writes every header chunk ahead of the data chunk, so the
+        # samples are the trailing bytes of the file.
+        offset = self._output_path.stat().st_size - self._write_idx * self.config.channels * dtype.itemsize
+        return np.memmap(self._output_path, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+    def _grow_loop(self) -> None:
+        """Allocate larger capture buffers off the audio thread."""
+        while True:
+            capacity = self._grow_requests.get()
+            if capacity is None:
+                return
+            ring = self._ring
+            copied = self._write_idx
+            grown = _prefaulted((capacity, self.config.channels), self.config.dtype)
+            grown[:copied] = ring[:copied]
+            self._grown.put((grown, copied))
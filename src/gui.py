@@ -5,18 +5,47 @@ from __future__ import annotations
 import datetime
 import threading
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 from tkinter import filedialog, messagebox
+from typing import Optional
 
 from audio_capture import AudioCaptureConfig, StreamingMicrophoneRecorder
 from config import load_environment
-from tokenization import LLMTokenizer
-from summarization import SummarizationError, summarize_with_ollama
-from transcription import SpeechToTextError, SpeechToTextService, WhisperLocalTranscriber
+from tokenization import get_tokenizer
+from summarization import (
+    SummarizationError,
+    SummaryResult,
+    answer_followup,
+    stream_summary_with_ollama,
+    warm_ollama,
+)
+from transcription import (
+    PROVIDERS,
+    SpeechToTextError,
+    create_transcriber,
+    default_local_provider,
+)
 
 load_environment()
 
 
+@dataclass(frozen=True)
+class _RunSettings:
+    """Widget values read on the Tk thread for use by a background run."""
+
+    provider: str
+    whisper_model: str
+    batch_size: int
+    tokenizer_model: Optional[str]
+    encoding: Optional[str]
+    summarize: bool
+    ollama_model: Optional[str]
+    ollama_url: Optional[str]
+    save_output: bool
+
+
 class AudioGuiApp:
     """Tk-based interface with record/stop controls."""
 
@@ -27,18 +56,33 @@ class AudioGuiApp:
         self.recorder = StreamingMicrophoneRecorder(AudioCaptureConfig())
         self.is_recording = False
 
+        self.provider_var = tk.StringVar(value=default_local_provider())
         self.whisper_model_var = tk.StringVar(value="base")
+        self.batch_size_var = tk.StringVar(value="0")
         self.tokenizer_model_var = tk.StringVar(value="")
         self.encoding_var = tk.StringVar(value="")
         self.status_var = tk.StringVar(value="Idle")
         self.summarize_var = tk.BooleanVar(value=False)
         self.ollama_model_var = tk.StringVar(value="llama3")
         self.ollama_url_var = tk.StringVar(value="http://localhost:11434/api/generate")
+        self.followup_var = tk.StringVar(value="")
+        # Ollama token state from the last response, reused for follow-up questions.
+        self._last_ollama_context: Optional[list[int]] = None
 
         self.save_output_var = tk.BooleanVar(value=False)
         self.save_directory = tk.StringVar(value=str(Path.cwd() / "outputs"))
 
+        self._warm_job: Optional[str] = None
+        self._executor = ThreadPoolExecutor(max_workers=2)
+
         self._build_ui()
+        self.provider_var.trace_add("write", self._schedule_transcriber_warmup)
+        self.whisper_model_var.trace_add("write", self._schedule_transcriber_warmup)
+        self.batch_size_var.trace_add("write", self._schedule_transcriber_warmup)
+        self.summarize_var.trace_add("write", self._on_summarize_toggled)
+        self._warm_transcriber()
+        if self.summarize_var.get():
+            self._warm_ollama()
 
     def _build_ui(self) -> None:
         padding = {"padx": 10, "pady": 5}
@@ -46,17 +90,28 @@ class AudioGuiApp:
         model_frame = tk.LabelFrame(self.root, text="Model Settings")
         model_frame.pack(fill="x", **padding)
 
-        tk.Label(model_frame, text="Whisper model:").grid(row=0, column=0, sticky="w")
+        tk.Label(model_frame, text="Backend:").grid(row=0, column=0, sticky="w")
+        provider_frame = tk.Frame(model_frame)
+        provider_frame.grid(row=0, column=1, sticky="w", padx=5)
+        for provider in PROVIDERS:
+            tk.Radiobutton(
+                provider_frame, text=provider, value=provider, variable=self.provider_var
+            ).pack(side="left")
+        tk.Label(model_frame, text="Whisper model:").grid(row=1, column=0, sticky="w")
         tk.Entry(model_frame, textvariable=self.whisper_model_var).grid(
-            row=0, column=1, sticky="ew", padx=5
+            row=1, column=1, sticky="ew", padx=5
         )
-        tk.Label(model_frame, text="Tokenizer model:").grid(row=1, column=0, sticky="w")
+        tk.Label(model_frame, text="Tokenizer model:").grid(row=2, column=0, sticky="w")
         tk.Entry(model_frame, textvariable=self.tokenizer_model_var).grid(
-            row=1, column=1, sticky="ew", padx=5
+            row=2, column=1, sticky="ew", padx=5
         )
-        tk.Label(model_frame, text="Encoding override:").grid(row=2, column=0, sticky="w")
+        tk.Label(model_frame, text="Encoding override:").grid(row=3, column=0, sticky="w")
         tk.Entry(model_frame, textvariable=self.encoding_var).grid(
-            row=2, column=1, sticky="ew", padx=5
+            row=3, column=1, sticky="ew", padx=5
+        )
+        tk.Label(model_frame, text="Batch size (0 = off):").grid(row=4, column=0, sticky="w")
+        tk.Entry(model_frame, textvariable=self.batch_size_var).grid(
+            row=4, column=1, sticky="ew", padx=5
         )
         model_frame.columnconfigure(1, weight=1)
 
@@ -104,8 +159,20 @@ class AudioGuiApp:
         tk.Entry(summarize_frame, textvariable=self.ollama_url_var).grid(
             row=2, column=1, sticky="ew", padx=5
         )
+        tk.Label(summarize_frame, text="Follow-up question:").grid(row=3, column=0, sticky="w")
+        tk.Entry(summarize_frame, textvariable=self.followup_var).grid(
+            row=3, column=1, sticky="ew", padx=5
+        )
+        tk.Button(summarize_frame, text="Ask", command=self.ask_followup).grid(
+            row=3, column=2, sticky="ew", padx=5
+        )
         summarize_frame.columnconfigure(1, weight=1)
 
+        summary_frame = tk.LabelFrame(self.root, text="Summary")
+        summary_frame.pack(fill="both", expand=True, **padding)
+        self.summary_text = tk.Text(summary_frame, height=8, wrap="word", state="disabled")
+        self.summary_text.pack(fill="both", expand=True, padx=5, pady=2)
+
         save_frame = tk.LabelFrame(self.root, text="Save Output")
         save_frame.pack(fill="x", **padding)
         tk.Checkbutton(
@@ -162,16 +229,32 @@ class AudioGuiApp:
             return
 
         self.status_var.set("Processing transcription...")
+        # Tk variables are only read here, on the Tk thread; the worker gets a snapshot.
         worker = threading.Thread(
-            target=self._process_audio, args=(audio,), daemon=True
+            target=self._process_audio, args=(audio, self._collect_settings()), daemon=True
         )
         worker.start()
 
-    def _process_audio(self, audio) -> None:
+    def _collect_settings(self) -> _RunSettings:
+        return _RunSettings(
+            provider=self.provider_var.get(),
+            whisper_model=self.whisper_model_var.get().strip() or "base",
+            batch_size=self._batch_size(),
+            tokenizer_model=self.tokenizer_model_var.get().strip() or None,
+            encoding=self.encoding_var.get().strip() or None,
+            summarize=self.summarize_var.get(),
+            ollama_model=self.ollama_model_var.get().strip() or None,
+            ollama_url=self.ollama_url_var.get().strip() or None,
+            save_output=self.save_output_var.get(),
+        )
+
+    def _process_audio(self, audio, settings: _RunSettings) -> None:
         try:
-            transcriber = self._build_transcriber()
+            transcriber = create_transcriber(
+                settings.provider, model_name=settings.whisper_model, batch_size=settings.batch_size
+            )
             transcription = transcriber.transcribe(audio, self.recorder.config.sample_rate)
-        except SpeechToTextError as exc:
+        except (SpeechToTextError, ValueError) as exc:
             self._update_status("Transcription failed.")
             print(f"Transcription failed: {exc}")
             self._set_exit_enabled(True)
@@ -182,11 +265,18 @@ class AudioGuiApp:
             self._set_exit_enabled(True)
             return
 
-        tokenizer = LLMTokenizer(
-            model=self.tokenizer_model_var.get().strip() or None,
-            encoding_name=self.encoding_var.get().strip() or None,
-        )
-        token_result = tokenizer.encode(transcription.text)
+        tokenizer = get_tokenizer(settings.tokenizer_model, settings.encoding)
+        # Tokenize locally while the Ollama request is in flight.
+        token_future = self._executor.submit(tokenizer.encode, transcription.text)
+        summary_future = None
+        if settings.summarize:
+            summary_future = self._executor.submit(
+                self._stream_summary,
+                transcription.text,
+                model=settings.ollama_model,
+                url=settings.ollama_url,
+            )
+        token_result = token_future.result()
 
         output_lines = []
         output_lines.append("=== Transcription Result ===")
@@ -195,25 +285,22 @@ class AudioGuiApp:
             output_lines.append(f"Language: {transcription.language}")
         output_lines.append(f"Token count ({token_result.encoding_name}): {token_result.count()}")
 
-        if self.summarize_var.get():
+        if summary_future is not None:
             try:
-                summary = summarize_with_ollama(
-                    transcription.text,
-                    model=self.ollama_model_var.get().strip() or None,
-                    url=self.ollama_url_var.get().strip() or None,
-                )
+                summary = summary_future.result()
             except SummarizationError as exc:
                 self._update_status("Summary failed.")
                 print(f"Summarization failed: {exc}")
                 output_lines.append(f"Summarization failed: {exc}")
             else:
+                self._last_ollama_context = summary.context
                 output_lines.append(f"Summary ({summary.model}):\n{summary.summary}")
                 output_lines.append(f"Answer: {summary.answer}")
 
         for line in output_lines:
             print(line)
 
-        if self.save_output_var.get():
+        if settings.save_output:
             self.root.after(
                 0,
                 self._prompt_save_dialog,
@@ -224,9 +311,106 @@ class AudioGuiApp:
         self._update_status("Done.")
         self._set_exit_enabled(True)
 
-    def _build_transcriber(self) -> SpeechToTextService:
+    def _stream_summary(self, text: str, model: Optional[str], url: Optional[str]) -> SummaryResult:
+        """Show summary tokens as Ollama generates them; return the parsed result."""
+        stream = stream_summary_with_ollama(text, model=model, url=url)
+        self.root.after(0, self._clear_summary_text)
+        for chunk in stream:
+            self.root.after(0, self._append_summary_text, chunk)
+        return stream.result
+
+    def _clear_summary_text(self) -> None:
+        self.summary_text.config(state="normal")
+        self.summary_text.delete("1.0", "end")
+        self.summary_text.config(state="disabled")
+
+    def _append_summary_text(self, chunk: str) -> None:
+        self.summary_text.config(state="normal")
+        self.summary_text.insert("end", chunk)
+        self.summary_text.see("end")
+        self.summary_text.config(state="disabled")
+
+    def ask_followup(self) -> None:
+        question = self.followup_var.get().strip()
+        if not question:
+            return
+        if self._last_ollama_context is None:
+            self.status_var.set("Summarize a transcript before asking a follow-up.")
+            return
+
+        self.status_var.set("Answering follow-up...")
+        worker = threading.Thread(
+            target=self._process_followup,
+            args=(
+                question,
+                self.ollama_model_var.get().strip() or None,
+                self.ollama_url_var.get().strip() or None,
+            ),
+            daemon=True,
+        )
+        worker.start()
+
+    def _process_followup(self, question: str, model: Optional[str], url: Optional[str]) -> None:
+        try:
+            result = answer_followup(question, self._last_ollama_context, model=model, url=url)
+        except SummarizationError as exc:
+            self._update_status("Follow-up failed.")
+            print(f"Follow-up failed: {exc}")
+            return
+
+        self._last_ollama_context = result.context or self._last_ollama_context
+        print(f"Follow-up: {question}")
+        print(f"Answer: {result.answer}")
+        self._update_status("Done.")
+
+    def _batch_size(self) -> int:
+        try:
+            return max(int(self.batch_size_var.get().strip() or 0), 0)
+        except ValueError:
+            return 0
+
+    def _schedule_transcriber_warmup(self, *_args) -> None:
+        # Debounce so typing a model name does not load every prefix.
+        if self._warm_job is not None:
+            self.root.after_cancel(self._warm_job)
+        self._warm_job = self.root.after(750, self._warm_transcriber)
+
+    def _warm_transcriber(self) -> None:
+        self._warm_job = None
         model_name = self.whisper_model_var.get().strip() or "base"
-        return WhisperLocalTranscriber(model_name=model_name)
+        threading.Thread(
+            target=self._preload_transcriber,
+            args=(self.provider_var.get(), model_name, self._batch_size()),
+            daemon=True,
+        ).start()
+
+    @staticmethod
+    def _preload_transcriber(provider: str, model_name: str, batch_size: int) -> None:
+        try:
+            create_transcriber(provider, model_name=model_name, batch_size=batch_size)
+        except Exception as exc:  # pragma: no cover - preload is best effort
+            print(f"Failed to preload Whisper model '{model_name}': {exc}")
+
+    def _on_summarize_toggled(self, *_args) -> None:
+        if self.summarize_var.get():
+            self._warm_ollama()
+
+    def _warm_ollama(self) -> None:
+        threading.Thread(
+            target=self._preload_ollama,
+            args=(
+                self.ollama_model_var.get().strip() or None,
+                self.ollama_url_var.get().strip() or None,
+            ),
+            daemon=True,
+        ).start()
+
+    @staticmethod
+    def _preload_ollama(model: Optional[str], url: Optional[str]) -> None:
+        try:
+            warm_ollama(model=model, url=url)
+        except SummarizationError as exc:  # pragma: no cover - preload is best effort
+            print(f"Failed to preload Ollama model: {exc}")
 
     def _update_status(self, message: str) -> None:
         def setter() -> None:
@@ -242,6 +426,7 @@ class AudioGuiApp:
         self.root.after(0, setter)
 
     def _exit_app(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
         self.root.destroy()
 
     def _choose_directory(self) -> None:
@@ -5,15 +5,57 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import os
+import re
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from .lru import LRUCache
+except ImportError:  # imported as a top-level module with src/ on sys.path
+    from lru import LRUCache
 
 logger = logging.getLogger(__name__)
 
+_KEEP_ALIVE = "30m"
+
+# The instructions are sent verbatim as the system prompt on every call, so
+# every request shares the same token prefix and Ollama can reuse its KV cache.
+_SUMMARY_PREFIX = (
+    "You are an assistant that summarizes transcripts and answers any questions found within them.\n"
+    "If the transcript is empty or only noise, output:\n"
+    "Summary:\n- N/A\n- N/A\n- N/A\nAnswer: N/A\n"
+    "Otherwise follow these rules exactly:\n"
+    "1. Provide exactly three concise bullet points summarizing the transcript.\n"
+    "2. After the bullets, write 'Answer:' followed by a short answer to any question in the transcript. If there is no question, write 'Answer: N/A'.\n"
+    "3. Do not ask for additional context. Never refuse. Never repeat the instructions.\n"
+)
+
+# num_keep=-1 keeps the whole prompt (instructions included) if the context shifts.
+_GENERATE_OPTIONS = {"temperature": 0.0, "num_keep": -1}
+
+_ANSWER_RE = re.compile(r"answer:", re.IGNORECASE)
+# Any line break (as str.splitlines sees them) with the whitespace around it.
+_LINE_BREAK_RE = re.compile(r"\s*[\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]\s*")
+_HEADING_RE = re.compile(r"^summary:$", re.IGNORECASE | re.MULTILINE)
+_BULLET_RE = re.compile(r"^(?!-|Summary:$)", re.MULTILINE)
+
+# Reuse keep-alive connections to the Ollama server across calls. The pool is
+# sized for concurrent web requests, which run summaries on worker threads.
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_SESSION.headers["Connection"] = "keep-alive"
+
+
+_SummaryKey = Tuple[bytes, str, str]
+
 
 class SummarizationError(RuntimeError):
     """Raised when summarization fails."""
@@ -24,64 +66,220 @@ class SummaryResult:
     summary: str
     answer: str
     model: str
+    context: Optional[List[int]] = None
+
+
+@dataclass
+class FollowUpResult:
+    answer: str
+    model: str
+    context: Optional[List[int]] = None
+
+
+# Generation runs at temperature 0, so a repeated transcript gets the same summary.
+_summary_cache: LRUCache[_SummaryKey, Tuple[str, SummaryResult]] = LRUCache(maxsize=256)
 
 
 def summarize_with_ollama(text: str, model: Optional[str] = None, url: Optional[str] = None) -> SummaryResult:
     """Send the transcript to a local Ollama server for summarization."""
 
-    target_model = model or os.getenv("OLLAMA_MODEL", "llama3")
-    endpoint = url or os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate") #post to OLLAMA_URL, or default
+    target_model, endpoint = _resolve_target(model, url)
+    key = _summary_key(text, target_model, endpoint)
+    cached = _summary_cache.get(key)
+    if cached is not None:
+        return cached[1]
 
-    cleaned_text = text.strip()
-
-    prompt = (
-        "You are an assistant that summarizes transcripts and answers any questions found within them.\n"
-        "If the transcript is empty or only noise, output:\n"
-        "Summary:\n- N/A\n- N/A\n- N/A\nAnswer: N/A\n"
-        "Otherwise follow these rules exactly:\n"
-        "1. Provide exactly three concise bullet points summarizing the transcript.\n"
-        "2. After the bullets, write 'Answer:' followed by a short answer to any question in the transcript. If there is no question, write 'Answer: N/A'.\n"
-        "3. Do not ask for additional context. Never refuse. Never repeat the instructions.\n"
-        "Transcript:\n"
-        f"{cleaned_text}\n\n" #insert text from transcription
-        "Summary:\n- "
+    payload = _summary_payload(text, target_model, stream=False)
+
+    data = _post_generate(endpoint, payload)
+    summary_text = data.get("response", "").strip()
+    if not summary_text:
+        raise SummarizationError("Summarizer returned empty response")
+
+    summary_section, answer_section = _split_summary_answer(summary_text)
+
+    result = SummaryResult(
+        summary=summary_section,
+        answer=answer_section,
+        model=target_model,
+        context=data.get("context"),
     )
+    _summary_cache.put(key, (summary_text, result))
+    return result
+
+
+class SummaryStream:
+    """Iterates over summary text chunks as Ollama generates them.
+
+    Once iteration finishes, ``result`` holds the parsed SummaryResult.
+    """
+
+    def __init__(self, response: requests.Response, model: str, key: Optional[_SummaryKey] = None) -> None:
+        self._response = response
+        self._model = model
+        self._key = key
+        self.result: Optional[SummaryResult] = None
+
+    def __iter__(self) -> Iterator[str]:
+        parts: List[str] = []
+        context: Optional[List[int]] = None
+        try:
+            with self._response:
+                for line in self._response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if "error" in data:
+                        raise SummarizationError(f"Summarizer error: {data['error']}")
+                    chunk = data.get("response", "")
+                    if chunk:
+                        parts.append(chunk)
+                        yield chunk
+                    if data.get("done"):
+                        context = data.get("context")
+                        break
+        except requests.RequestException as exc:
+            raise SummarizationError("Lost connection to local LLM summarizer") from exc
+
+        summary_text = "".join(parts).strip()
+        if not summary_text:
+            raise SummarizationError("Summarizer returned empty response")
+        summary_section, answer_section = _split_summary_answer(summary_text)
+        self.result = SummaryResult(
+            summary=summary_section,
+            answer=answer_section,
+            model=self._model,
+            context=context,
+        )
+        if self._key is not None:
+            _summary_cache.put(self._key, (summary_text, self.result))
+
+
+class _CachedSummaryStream(SummaryStream):
+    """Replays a cached summary as a single chunk."""
+
+    def __init__(self, response_text: str, result: SummaryResult) -> None:
+        self._response_text = response_text
+        self._cached = result
+        self.result: Optional[SummaryResult] = None
+
+    def __iter__(self) -> Iterator[str]:
+        yield self._response_text
+        self.result = self._cached
+
+
+def stream_summary_with_ollama(
+    text: str, model: Optional[str] = None, url: Optional[str] = None
+) -> SummaryStream:
+    """Like summarize_with_ollama, but yields the summary while it is generated."""
+
+    target_model, endpoint = _resolve_target(model, url)
+    key = _summary_key(text, target_model, endpoint)
+    cached = _summary_cache.get(key)
+    if cached is not None:
+        return _CachedSummaryStream(*cached)
 
+    payload = _summary_payload(text, target_model, stream=True)
+
+    try:
+        response = _SESSION.post(endpoint, json=payload, timeout=120, stream=True)
+        response.raise_for_status()
+    except requests.RequestException as exc:
+        logger.exception("Failed to contact Ollama at %s", endpoint)
+        raise SummarizationError("Unable to reach local LLM summarizer") from exc
+    return SummaryStream(response, target_model, key)
+
+
+def _summary_key(text: str, model: str, endpoint: str) -> _SummaryKey:
+    digest = hashlib.blake2b(text.strip().encode("utf-8"), digest_size=16).digest()
+    return (digest, model, endpoint)
+
+
+def _summary_payload(text: str, model: str, stream: bool) -> dict:
+    return {
+        "model": model,
+        "system": _SUMMARY_PREFIX,
+        "prompt": f"Transcript:\n{text.strip()}\n\nSummary:\n- ", #insert text from transcription
+        "stream": stream,
+        "keep_alive": _KEEP_ALIVE,
+        "options": _GENERATE_OPTIONS,
+    }
+
+
+def answer_followup(
+    question: str,
+    context: Optional[List[int]],
+    model: Optional[str] = None,
+    url: Optional[str] = None,
+) -> FollowUpResult:
+    """Ask a follow-up question about the last summarized transcript.
+
+    ``context`` is the token state Ollama returned with the previous response;
+    sending it back lets the server restore its KV cache instead of prefilling
+    the transcript again.
+    """
+
+    target_model, endpoint = _resolve_target(model, url)
     payload = {
         "model": target_model,
-        "prompt": prompt,
+        "prompt": f"Follow-up question about the transcript: {question.strip()}\nAnswer briefly.\nAnswer: ",
         "stream": False,
-        "options": {
-            "temperature": 0.0,
-        },
+        "keep_alive": _KEEP_ALIVE,
+        "options": _GENERATE_OPTIONS,
     }
+    if context:
+        payload["context"] = context
+
+    data = _post_generate(endpoint, payload)
+    answer_text = data.get("response", "").strip()
+    if not answer_text:
+        raise SummarizationError("Summarizer returned empty response")
+
+    return FollowUpResult(answer=answer_text, model=target_model, context=data.get("context"))
+
 
+def warm_ollama(model: Optional[str] = None, url: Optional[str] = None) -> None:
+    """Load the model on the Ollama server ahead of the first summary."""
+
+    target_model, endpoint = _resolve_target(model, url)
+    payload = {
+        "model": target_model,
+        "prompt": "", #an empty prompt only loads the model
+        "keep_alive": _KEEP_ALIVE,
+        "options": {"num_predict": 1},
+    }
+
+    try:
+        response = _SESSION.post(endpoint, json=payload, timeout=120)
+        response.raise_for_status()
+    except requests.RequestException as exc:
+        raise SummarizationError(f"Unable to preload {target_model} on {endpoint}") from exc
+
+
+def _post_generate(endpoint: str, payload: dict) -> dict:
     try:
-        response = requests.post(endpoint, json=payload, timeout=120)
+        response = _SESSION.post(endpoint, json=payload, timeout=120)
         response.raise_for_status()
     except requests.RequestException as exc:
         logger.exception("Failed to contact Ollama at %s", endpoint)
         raise SummarizationError("Unable to reach local LLM summarizer") from exc
+    return response.json()
 
-    data = response.json()
-    summary_text = data.get("response", "").strip()
-    if not summary_text:
-        raise SummarizationError("Summarizer returned empty response")
 
-    summary_section, answer_section = _split_summary_answer(summary_text)
-
-    return SummaryResult(summary=summary_section, answer=answer_section, model=target_model)
+def _resolve_target(model: Optional[str], url: Optional[str]) -> tuple[str, str]:
+    target_model = model or os.getenv("OLLAMA_MODEL", "llama3")
+    endpoint = url or os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate") #post to OLLAMA_URL, or default
+    return target_model, endpoint
 
 
 def _split_summary_answer(response_text: str) -> tuple[str, str]:
     """Split the model response into summary bullets and answer line."""
-    lower = response_text.lower()
-    answer_idx = lower.find("answer:") #split by "answer:"
-    if answer_idx == -1:
+    match = _ANSWER_RE.search(response_text) #split by "answer:"
+    if match is None:
         return (_normalize_summary(response_text), "N/A")
 
-    summary_raw = response_text[:answer_idx].strip()
-    answer_raw = response_text[answer_idx + len("answer:") :].strip()
+    summary_raw = response_text[: match.start()].strip()
+    answer_raw = response_text[match.end() :].strip()
     return (_normalize_summary(summary_raw), answer_raw or "N/A")
 
 
@@ -91,19 +289,9 @@ def _normalize_summary(summary_raw: str) -> str:
     if not summary:
         return "Summary:\n- N/A"
 
-    if not summary.lower().startswith("summary"):
+    if summary[:7].lower() != "summary":
         summary = "Summary:\n" + summary
 
-    lines = []
-    for line in summary.splitlines():
-        stripped = line.strip()
-        if not stripped:
-            continue
-        if stripped.lower() == "summary:":
-            lines.append("Summary:")
-            continue
-        if not stripped.startswith("-"):
-            stripped = "- " + stripped.lstrip("- ")
-        lines.append(stripped)
-    return "\n".join(lines)
-
+    summary = _LINE_BREAK_RE.sub("\n", summary) #strip lines, drop blank ones
+    summary = _HEADING_RE.sub("Summary:", summary)
+    return _BULLET_RE.sub("- ", summary)
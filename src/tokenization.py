@@ -2,11 +2,31 @@
 
 from __future__ import annotations
 
+import hashlib
+import logging
+import os
+import re
 from dataclasses import dataclass
-from typing import Iterable, List, Optional
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple, Union
 
 import tiktoken
 
+try:
+    from .lru import LRUCache
+except ImportError:  # imported as a top-level module with src/ on sys.path
+    from lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Texts longer than this are split at sentence boundaries and cached per chunk.
+_CHUNK_MIN_CHARS = 256
+# Chunks longer than this are keyed by digest instead of by the text itself.
+_HASH_MIN_CHARS = 128
+# A sentence end followed by a single space and a letter is always a tiktoken
+# pre-token boundary, so encoding the pieces separately yields the same ids.
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])(?= [^\W\d_])")
+
 
 @dataclass
 class TokenizationResult:
@@ -19,24 +39,66 @@ class TokenizationResult:
         return len(self.tokens)
 
 
+# Encoded chunks keyed by (encoding name, chunk or digest).
+_encode_cache: LRUCache[Tuple[str, Union[str, bytes]], Tuple[int, ...]] = LRUCache(maxsize=1024)
+
+
+@lru_cache(maxsize=32)
+def _get_encoding(model: Optional[str], encoding_name: Optional[str]) -> tiktoken.Encoding:
+    """Resolve (and cache) the tiktoken encoding; loading BPE ranks is slow."""
+    if encoding_name:
+        return tiktoken.get_encoding(encoding_name)
+    target_model = model or "gpt-4o-mini"
+    try:
+        return tiktoken.encoding_for_model(target_model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
 class LLMTokenizer:
     """Thin wrapper around tiktoken encoder."""
 
     def __init__(self, model: Optional[str] = None, encoding_name: Optional[str] = None) -> None:
-        if encoding_name:
-            self._encoding = tiktoken.get_encoding(encoding_name)
-        else:
-            target_model = model or "gpt-4o-mini"
-            try:
-                self._encoding = tiktoken.encoding_for_model(target_model)
-            except KeyError:
-                self._encoding = tiktoken.get_encoding("cl100k_base")
+        self._encoding = _get_encoding(model, encoding_name)
         self.encoding_name = self._encoding.name
 
     def encode(self, text: str) -> TokenizationResult:
-        tokens = self._encoding.encode(text, allowed_special="all")
+        """Encode text, reusing cached ids for previously seen sentences."""
+        chunks = _SENTENCE_SPLIT_RE.split(text) if len(text) > _CHUNK_MIN_CHARS else [text]
+        tokens: List[int] = []
+        for chunk in chunks:
+            tokens.extend(self._encode_chunk(chunk))
+        logger.debug(
+            "Encode cache: %d hits, %d misses, %d entries",
+            _encode_cache.hits,
+            _encode_cache.misses,
+            len(_encode_cache),
+        )
         return TokenizationResult(tokens=tokens, encoding_name=self.encoding_name)
 
+    def encode_many(self, texts: List[str]) -> List[TokenizationResult]:
+        """Encode several texts at once; tiktoken runs the BPE on a thread pool without the GIL."""
+        encoded = self._encoding.encode_batch(
+            texts, num_threads=os.cpu_count() or 1, allowed_special="all"
+        )
+        return [TokenizationResult(tokens=tokens, encoding_name=self.encoding_name) for tokens in encoded]
+
     def decode(self, tokens: Iterable[int]) -> str:
         return self._encoding.decode(list(tokens))
 
+    def _encode_chunk(self, chunk: str) -> Tuple[int, ...]:
+        key_text: Union[str, bytes] = chunk
+        if len(chunk) > _HASH_MIN_CHARS:
+            key_text = hashlib.blake2b(chunk.encode("utf-8"), digest_size=16).digest()
+        key = (self.encoding_name, key_text)
+        tokens = _encode_cache.get(key)
+        if tokens is None:
+            tokens = tuple(self._encoding.encode(chunk, allowed_special="all"))
+            _encode_cache.put(key, tokens)
+        return tokens
+
+
+@lru_cache(maxsize=32)
+def get_tokenizer(model: Optional[str] = None, encoding_name: Optional[str] = None) -> LLMTokenizer:
+    """Return a shared LLMTokenizer for the given model/encoding."""
+    return LLMTokenizer(model=model, encoding_name=encoding_name)
@@ -2,14 +2,29 @@
 
 from __future__ import annotations
 
+import importlib.util
 import logging
+import threading
 from dataclasses import dataclass
-from typing import Optional, Protocol
+from typing import Any, Callable, Optional, Protocol
 
 import numpy as np
+import soxr
+
+try:
+    from .lru import LRUCache
+except ImportError:  # imported as a top-level module with src/ on sys.path
+    from lru import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# Loaded model weights keyed by (backend, model name, device, ...), shared by
+# every transcriber instance in the process. Bounded so clients cannot pin
+# every model size in memory; the least recently used model is dropped.
+_LOCAL_MODEL_CACHE: LRUCache[tuple, Any] = LRUCache(maxsize=2)
+# One lock per model being loaded, so a slow load only blocks callers of that model.
+_MODEL_LOAD_LOCKS: dict[tuple, threading.Lock] = {}
+_MODEL_LOAD_LOCKS_LOCK = threading.Lock()
 
 class SpeechToTextError(RuntimeError):
     """Raised when transcription fails."""
@@ -31,11 +46,66 @@ class SpeechToTextService(Protocol):
         """Return the transcription for the given audio clip."""
 
 
+def _cached_model(key: tuple, loader: Callable[[], Any]) -> Any:
+    """Return the cached model for key, loading it at most once."""
+    model = _LOCAL_MODEL_CACHE.get(key)
+    if model is not None:
+        return model
+    with _MODEL_LOAD_LOCKS_LOCK:
+        load_lock = _MODEL_LOAD_LOCKS.setdefault(key, threading.Lock())
+
+    with load_lock:
+        model = _LOCAL_MODEL_CACHE.get(key) #loaded by another thread while we waited
+        if model is None:
+            logger.info("Loading %s model '%s'", key[0], key[1])
+            model = loader()
+            _LOCAL_MODEL_CACHE.put(key, model)
+    with _MODEL_LOAD_LOCKS_LOCK:
+        _MODEL_LOAD_LOCKS.pop(key, None)
+    return model
+
+WHISPER_SAMPLE_RATE = 16_000
+
+
+def _prepare_audio(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Return mono float32 samples in [-1, 1] at 16 kHz, as Whisper expects."""
+    audio = _to_mono_float(audio)
+    if sample_rate != WHISPER_SAMPLE_RATE:
+        audio = soxr.resample(audio, sample_rate, WHISPER_SAMPLE_RATE)
+    return audio
+
+
+def _to_mono_float(audio: np.ndarray) -> np.ndarray:
+    """Downmix to mono float32, converting integer PCM in a single pass."""
+    scale = 1.0
+    offset = 0.0
+    if np.issubdtype(audio.dtype, np.integer):
+        info = np.iinfo(audio.dtype)
+        half_range = (info.max - info.min + 1) / 2
+        scale = 1.0 / half_range
+        offset = -(info.min + half_range) * scale #recentres unsigned PCM; 0 for signed
+    if audio.ndim > 1 and audio.shape[1] > 1:
+        # Sum channels straight into float32 (no float64 temporary), then fold
+        # the channel average and PCM scaling into a single multiply.
+        mono = np.add.reduce(np.ascontiguousarray(audio), axis=1, dtype=np.float32)
+        mono *= scale / audio.shape[1]
+    else:
+        audio = audio.reshape(-1)
+        if scale == 1.0:
+            return np.ascontiguousarray(audio, dtype=np.float32) #no copy when already float32
+        mono = audio.astype(np.float32)
+        mono *= scale
+    if offset:
+        mono += offset
+    return mono
+
+
 class WhisperLocalTranscriber:
     """Runs the open-source Whisper model locally."""
 
     def __init__(self, model_name: str = "base", device: Optional[str] = None) -> None:
         try:
+            import torch  # type: ignore
             import whisper  # type: ignore
         except ImportError as exc:  # pragma: no cover - dependency hint
             raise ImportError(
@@ -43,15 +113,119 @@ class WhisperLocalTranscriber:
             ) from exc
 
         self._whisper = whisper
-        self._model = whisper.load_model(model_name, device=device)
+        self._model = _cached_model(
+            ("whisper", model_name, device),
+            lambda: whisper.load_model(model_name, device=device),
+        )
+        # transcribe() builds the log-mel spectrogram on the CPU; load the
+        # cached mel filterbank now rather than on the first recording.
+        whisper.audio.mel_filters(torch.device("cpu"), self._model.dims.n_mels)
 
     def transcribe(self, audio: np.ndarray, sample_rate: int) -> TranscriptionResult:
-        # Whisper expects float32 numpy array at 16000 Hz; resample handled internally.
-        audio = audio.squeeze()
-        result = self._model.transcribe(audio, fp16=False)
+        # Whisper does not resample numpy input; _prepare_audio converts to 16 kHz.
+        audio = _prepare_audio(audio, sample_rate)
+        result = self._model.transcribe(audio, fp16=self._model.device.type == "cuda")
         text = result.get("text", "").strip()
         if not text:
             raise SpeechToTextError("Whisper returned empty transcription")
         language = result.get("language")
         return TranscriptionResult(text=text, language=language, raw=result)
 
+
+class FasterWhisperTranscriber:
+    """Runs Whisper through faster-whisper (CTranslate2) with int8 weights."""
+
+    def __init__(
+        self,
+        model_name: str = "base",
+        device: Optional[str] = None,
+        compute_type: Optional[str] = None,
+    ) -> None:
+        try:
+            import ctranslate2  # type: ignore
+            from faster_whisper import WhisperModel  # type: ignore
+        except ImportError as exc:  # pragma: no cover - dependency hint
+            raise ImportError(
+                f"The faster-whisper package is required for {type(self).__name__}"
+            ) from exc
+
+        if compute_type is None:
+            use_cuda = device == "cuda" or (device is None and ctranslate2.get_cuda_device_count() > 0)
+            compute_type = "int8_float16" if use_cuda else "int8"
+        self._model = _cached_model(
+            ("faster-whisper", model_name, device, compute_type),
+            lambda: WhisperModel(model_name, device=device or "auto", compute_type=compute_type),
+        )
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int) -> TranscriptionResult:
+        # faster-whisper expects mono float32 at 16000 Hz.
+        audio = _prepare_audio(audio, sample_rate)
+        segments, info = self._run(audio)
+        segments = list(segments)
+        text = "".join(segment.text for segment in segments).strip()
+        if not text:
+            raise SpeechToTextError("Whisper returned empty transcription")
+        return TranscriptionResult(
+            text=text,
+            language=info.language,
+            raw={"segments": segments, "language": info.language},
+        )
+
+    def _run(self, audio: np.ndarray):
+        return self._model.transcribe(audio)
+
+
+class BatchedWhisperLocalTranscriber(FasterWhisperTranscriber):
+    """Runs Whisper through faster-whisper's batched inference pipeline.
+
+    The pipeline splits the clip on voice activity into sub-30s segments and
+    decodes them as a batch, which is several times faster than decoding the
+    segments one after another on long recordings.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "base",
+        device: Optional[str] = None,
+        compute_type: Optional[str] = None,
+        batch_size: int = 8,
+    ) -> None:
+        super().__init__(model_name=model_name, device=device, compute_type=compute_type)
+        from faster_whisper import BatchedInferencePipeline  # type: ignore
+
+        self._pipeline = BatchedInferencePipeline(model=self._model)
+        self._batch_size = batch_size
+
+    def _run(self, audio: np.ndarray):
+        return self._pipeline.transcribe(audio, batch_size=self._batch_size)
+
+
+PROVIDERS = ("whisper-local", "faster-whisper")
+
+
+def default_local_provider() -> str:
+    """Prefer faster-whisper whenever it is installed; it beats openai-whisper on CPU and GPU."""
+    if importlib.util.find_spec("faster_whisper") is None:
+        return "whisper-local"
+    return "faster-whisper"
+
+
+def create_transcriber(
+    provider: Optional[str] = None,
+    model_name: str = "base",
+    compute_type: Optional[str] = None,
+    batch_size: int = 0,
+) -> SpeechToTextService:
+    """Build a local transcriber; a positive batch size selects the batched pipeline."""
+    provider = provider or default_local_provider()
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unsupported provider: {provider}")
+    if batch_size > 0:
+        if provider != "faster-whisper":
+            raise ValueError("Batched decoding requires the faster-whisper provider")
+        return BatchedWhisperLocalTranscriber(
+            model_name=model_name, compute_type=compute_type, batch_size=batch_size
+        )
+    if provider == "faster-whisper":
+        return FasterWhisperTranscriber(model_name=model_name, compute_type=compute_type)
+    return WhisperLocalTranscriber(model_name=model_name)
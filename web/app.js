@@ -55,10 +55,10 @@ async function uploadRecording(blob) {
     const formData = new FormData();
     formData.append("file", blob, "recording.webm");
 
-    formData.append("provider", "whisper-local");
     formData.append("whisper_model", getInputValue("whisperModel") || "base");
     formData.append("tokenizer_model", getInputValue("tokenizerModel"));
     formData.append("encoding_name", getInputValue("encodingName"));
+    formData.append("include_tokens", getCheckboxChecked("includeTokens"));
 
     const shouldSummarize = getCheckboxChecked("shouldSummarize");
     formData.append("summarize", shouldSummarize);
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-import io
+import asyncio
+import logging
+import os
 import subprocess
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 import numpy as np
 import soundfile as sf
@@ -14,13 +17,41 @@ from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 from src.config import load_environment
-from src.summarization import SummarizationError, summarize_with_ollama
-from src.tokenization import LLMTokenizer
-from src.transcription import SpeechToTextError, WhisperLocalTranscriber
+from src.summarization import SummarizationError, SummaryResult, summarize_with_ollama
+from src.tokenization import LLMTokenizer, TokenizationResult, get_tokenizer
+from src.transcription import SpeechToTextError, SpeechToTextService, create_transcriber
 
 load_environment()
 
-app = FastAPI(title="Iota Mic-to-Token")
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Load the default encodings and Whisper model before the first request."""
+    await asyncio.gather(
+        asyncio.to_thread(_preload_tokenizers),
+        asyncio.to_thread(_preload_transcriber, os.getenv("WHISPER_PRELOAD", "base")),
+    )
+    yield
+
+
+def _preload_tokenizers() -> None:
+    try:
+        get_tokenizer(None, None) #same cache key as a request without tokenizer fields
+        get_tokenizer(None, "cl100k_base")
+    except Exception as exc:  # pragma: no cover - preload is best effort
+        logger.warning("Tokenizer preload failed: %s", exc)
+
+
+def _preload_transcriber(model_name: str) -> None:
+    try:
+        create_transcriber(model_name=model_name)
+    except Exception as exc:  # pragma: no cover - preload is best effort
+        logger.warning("Whisper preload failed: %s", exc)
+
+
+app = FastAPI(title="Iota Mic-to-Token", lifespan=_lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -36,29 +67,89 @@ app.mount("/static", StaticFiles(directory=static_dir), name="static")
 class TranscriptionResponse(BaseModel):
     transcript: str
     language: Optional[str]
-    tokens: list[int]
+    tokens: Optional[list[int]] = None
     token_count: int
     encoding_name: str
     summary: Optional[str] = None
     answer: Optional[str] = None
 
 
-def _load_audio_bytes(data: bytes) -> tuple[np.ndarray, int]:
+class _TokenizeBatcher:
+    """Coalesces concurrent tokenization requests into one encode_many call per tokenizer."""
+
+    def __init__(self, window: float = 0.01) -> None:
+        self._window = window
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def encode(self, tokenizer: LLMTokenizer, text: str) -> TokenizationResult:
+        loop = asyncio.get_running_loop()
+        # Restart the consumer if it died or belongs to an earlier event loop
+        # (e.g. the app was started again in the same process).
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        await self._queue.put((tokenizer, text, future))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            jobs = [await self._queue.get()]
+            await asyncio.sleep(self._window)
+            while not self._queue.empty():
+                jobs.append(self._queue.get_nowait())
+
+            groups: dict[LLMTokenizer, list] = {}
+            for job in jobs:
+                groups.setdefault(job[0], []).append(job)
+            for tokenizer, group in groups.items():
+                try:
+                    results = await asyncio.to_thread(tokenizer.encode_many, [text for _, text, _ in group])
+                except Exception as exc:  # pragma: no cover - surfaced to each caller
+                    for _, _, future in group:
+                        if not future.done():
+                            future.set_exception(exc)
+                    continue
+                for (_, _, future), result in zip(group, results):
+                    if not future.done():
+                        future.set_result(result)
+
+
+_tokenize_batcher = _TokenizeBatcher()
+
+# Summaries currently being generated, keyed by (transcript, model, url).
+_inflight_summaries: dict[tuple[str, Optional[str], Optional[str]], asyncio.Future] = {}
+
+
+async def _summarize(text: str, model: Optional[str], url: Optional[str]) -> SummaryResult:
+    """Share one Ollama call between concurrent requests for the same summary."""
+    key = (text.strip(), model, url)
+    task = _inflight_summaries.get(key)
+    if task is None:
+        task = asyncio.ensure_future(asyncio.to_thread(summarize_with_ollama, text, model=model, url=url))
+        _inflight_summaries[key] = task
+        task.add_done_callback(lambda _: _inflight_summaries.pop(key, None))
+    # Shield so one client disconnecting does not cancel the call for the others.
+    return await asyncio.shield(task)
+
+
+def _load_upload(upload: UploadFile) -> tuple[np.ndarray, int]:
+    """Decode the spooled upload in place; fall back to ffmpeg for other formats."""
+    upload.file.seek(0)
     try:
-        audio, sample_rate = sf.read(io.BytesIO(data), dtype="float32")
+        with sf.SoundFile(upload.file) as source:
+            shape = (source.frames,) if source.channels == 1 else (source.frames, source.channels)
+            audio = np.empty(shape, dtype=np.float32)
+            audio = source.read(out=audio) #a short read returns only the frames filled
+            sample_rate = source.samplerate
     except Exception:
-        converted = _convert_with_ffmpeg(data)
-        try:
-            audio, sample_rate = sf.read(io.BytesIO(converted), dtype="float32")
-        except Exception as exc:  # pragma: no cover - invalid uploads
-            raise HTTPException(status_code=400, detail=f"Unable to read audio file: {exc}") from exc
-
-    if audio.ndim == 1:
-        audio = audio[:, np.newaxis]
+        upload.file.seek(0)
+        return _decode_with_ffmpeg(upload.file.read())
     return audio, int(sample_rate)
 
 
-def _convert_with_ffmpeg(data: bytes) -> bytes: #convert audio to 16000 Hz mono WAV
+def _decode_with_ffmpeg(data: bytes) -> tuple[np.ndarray, int]: #decode audio to 16000 Hz mono float32 PCM
     try:
         process = subprocess.run(
             [
@@ -73,7 +164,7 @@ def _convert_with_ffmpeg(data: bytes) -> bytes: #convert audio to 16000 Hz mono
                 "-ar",
                 "16000",
                 "-f",
-                "wav",
+                "f32le",
                 "pipe:1",
             ],
             input=data,
@@ -83,7 +174,9 @@ def _convert_with_ffmpeg(data: bytes) -> bytes: #convert audio to 16000 Hz mono
         )
     except (FileNotFoundError, subprocess.CalledProcessError) as exc:  # pragma: no cover - system config
         raise HTTPException(status_code=500, detail="ffmpeg conversion failed; ensure ffmpeg is installed") from exc
-    return process.stdout
+    if not process.stdout:  # pragma: no cover - invalid uploads
+        raise HTTPException(status_code=400, detail="Unable to read audio file: no audio decoded")
+    return np.frombuffer(process.stdout, dtype="<f4").astype(np.float32), 16000
 
 
 def _normalize_bool(value: Optional[str]) -> bool:
@@ -92,12 +185,13 @@ def _normalize_bool(value: Optional[str]) -> bool:
     return value.lower() in {"true", "1", "yes", "on"}
 
 
-def _select_transcriber(provider: str, openai_model: Optional[str], whisper_model: Optional[str]):
-    if provider == "openai":
-        return OpenAIWhisperTranscriber(model=openai_model or None)
-    if provider == "whisper-local":
-        return WhisperLocalTranscriber(model_name=whisper_model or "base")
-    raise HTTPException(status_code=400, detail=f"Unsupported provider: {provider}")
+def _select_transcriber(provider: Optional[str], whisper_model: Optional[str]) -> SpeechToTextService:
+    try:
+        return create_transcriber(provider or None, model_name=whisper_model or "base")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except ImportError as exc:  # pragma: no cover - backend not installed
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
 @app.get("/")
@@ -108,35 +202,37 @@ async def index() -> FileResponse:
 @app.post("/transcribe", response_model=TranscriptionResponse) #transcribe endpoint
 async def transcribe_audio(
     file: UploadFile = File(...),
-    provider: str = Form("whisper-local"),
+    provider: Optional[str] = Form(None),
     whisper_model: Optional[str] = Form("base"),
     tokenizer_model: Optional[str] = Form(None),
     encoding_name: Optional[str] = Form(None),
+    include_tokens: Optional[str] = Form("false"),
     summarize: Optional[str] = Form("false"),
     ollama_model: Optional[str] = Form("llama3"),
     ollama_url: Optional[str] = Form("http://localhost:11434/api/generate"),
 ) -> TranscriptionResponse:
-    audio_bytes = await file.read()
-    audio, sample_rate = _load_audio_bytes(audio_bytes)
+    # Decoding, model loading, inference and the Ollama call all block, so
+    # they run on worker threads to keep the event loop serving other uploads.
+    audio, sample_rate = await asyncio.to_thread(_load_upload, file)
 
     try:
-        transcriber = WhisperLocalTranscriber(model_name=whisper_model or "base")
-        transcription = transcriber.transcribe(audio, sample_rate)
+        transcriber = await asyncio.to_thread(_select_transcriber, provider, whisper_model)
+        transcription = await asyncio.to_thread(transcriber.transcribe, audio, sample_rate)
     except SpeechToTextError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
-    tokenizer = LLMTokenizer(model=tokenizer_model or None, encoding_name=encoding_name or None)
-    token_result = tokenizer.encode(transcription.text)
+    try:
+        # A cache miss loads (and may download) the BPE ranks.
+        tokenizer = await asyncio.to_thread(get_tokenizer, tokenizer_model or None, encoding_name or None)
+    except (ValueError, KeyError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    token_result = await _tokenize_batcher.encode(tokenizer, transcription.text)
 
     summary_text: Optional[str] = None
     answer_text: Optional[str] = None
     if _normalize_bool(summarize):
         try:
-            summary = summarize_with_ollama(
-                transcription.text,
-                model=ollama_model or None,
-                url=ollama_url or None,
-            )
+            summary = await _summarize(transcription.text, ollama_model or None, ollama_url or None)
         except SummarizationError as exc:
             raise HTTPException(status_code=502, detail=str(exc)) from exc
         else:
@@ -146,7 +242,7 @@ async def transcribe_audio(
     return TranscriptionResponse(
         transcript=transcription.text,
         language=transcription.language,
-        tokens=token_result.tokens,
+        tokens=token_result.tokens if _normalize_bool(include_tokens) else None,
         token_count=token_result.count(),
         encoding_name=token_result.encoding_name,
         summary=summary_text,